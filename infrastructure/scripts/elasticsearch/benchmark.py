@@ -0,0 +1,524 @@
+#!/usr/bin/env uv run
+# /// script
+# dependencies = [
+#   "requests",
+#   "tqdm",
+#   "rich"
+# ]
+# ///
+
+import argparse
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from requests import Session
+from tqdm import tqdm
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+INDEX_PREFIX = "rtmc-bench-tasks"
+
+# Variant names become index name suffixes, which must be lowercase
+VARIANT_NAME = re.compile(r"^[a-z0-9][a-z0-9_.-]*$")
+
+# Knobs every variant starts from; variants only list what they change
+DEFAULT_VARIANT = {
+    "shards": 1,
+    "replicas": 0,
+    "refresh_interval": "1s",
+    "bulk_refresh_interval": None,
+    "analyzer": "standard",
+    "keyword_fields": True,
+    "autocomplete": False,
+}
+
+VARIANTS = {
+    "baseline": {},
+    "bulk-no-refresh": {"bulk_refresh_interval": "-1", "refresh_interval": "30s"},
+    "two-shards": {"shards": 2},
+    "english-analyzer": {"analyzer": "english"},
+    "text-fields": {"keyword_fields": False},
+    "autocomplete": {"autocomplete": True},
+}
+
+# Share of the query workload per query type
+QUERY_MIX = {
+    "full_text": 40,
+    "filtered": 25,
+    "aggregation": 15,
+    "prefix": 20,
+}
+
+WORDS = [
+    "api", "backend", "frontend", "login", "signup", "dashboard", "notification", "comment",
+    "team", "invite", "permission", "role", "search", "filter", "export", "import", "report",
+    "websocket", "signalr", "kafka", "rabbitmq", "redis", "cache", "postgres", "migration",
+    "index", "query", "latency", "timeout", "retry", "error", "crash", "memory", "leak",
+    "deploy", "helm", "ingress", "linkerd", "grafana", "metrics", "alert", "release", "build",
+    "pipeline", "docker", "kubernetes", "refactor", "cleanup", "upgrade", "dependency",
+    "security", "token", "session", "password", "email", "mobile", "layout", "theme",
+    "accessibility", "performance", "pagination", "sorting", "upload", "attachment", "avatar",
+]
+VERBS = ["fix", "add", "implement", "investigate", "improve", "update", "remove", "document", "review", "optimize"]
+STATUSES = ["todo", "in_progress", "in_review", "blocked", "done"]
+PRIORITIES = ["low", "medium", "high", "critical"]
+TEAMS = ["platform", "web", "mobile", "data", "infra"]
+ASSIGNEES = [f"user{i:03d}" for i in range(50)]
+
+
+def build_index_body(variant):
+    """Translate variant knobs into index settings and mappings"""
+    analysis = {"analyzer": {}}
+    title_fields = {}
+
+    if variant["autocomplete"]:
+        analysis["filter"] = {
+            "autocomplete_filter": {"type": "edge_ngram", "min_gram": 2, "max_gram": 15}
+        }
+        analysis["analyzer"]["autocomplete"] = {
+            "type": "custom",
+            "tokenizer": "standard",
+            "filter": ["lowercase", "autocomplete_filter"],
+        }
+        title_fields["autocomplete"] = {
+            "type": "text",
+            "analyzer": "autocomplete",
+            "search_analyzer": "standard",
+        }
+
+    text = {"type": "text", "analyzer": variant["analyzer"]}
+    if variant["keyword_fields"]:
+        exact = {"type": "keyword"}
+    else:
+        # What dynamic mapping would produce for a string field
+        exact = {"type": "text", "fields": {"keyword": {"type": "keyword", "ignore_above": 256}}}
+
+    settings = {
+        "number_of_shards": variant["shards"],
+        "number_of_replicas": variant["replicas"],
+        "refresh_interval": variant["bulk_refresh_interval"] or variant["refresh_interval"],
+    }
+    if analysis["analyzer"]:
+        settings["analysis"] = analysis
+
+    return {
+        "settings": settings,
+        "mappings": {
+            "properties": {
+                "title": {**text, "fields": title_fields} if title_fields else text,
+                "description": text,
+                "status": exact,
+                "priority": exact,
+                "team": exact,
+                "assignee": exact,
+                "labels": exact,
+                "created_at": {"type": "date"},
+                "due_date": {"type": "date"},
+                "estimate_hours": {"type": "integer"},
+            }
+        },
+    }
+
+
+def exact_field(variant, field):
+    return field if variant["keyword_fields"] else f"{field}.keyword"
+
+
+def generate_corpus(count, seed):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    for i in range(count):
+        created = start + timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+        yield {
+            "id": f"task-{i}",
+            "title": f"{rng.choice(VERBS)} {' '.join(rng.sample(WORDS, rng.randint(2, 4)))}",
+            "description": " ".join(rng.choices(WORDS + VERBS, k=rng.randint(15, 60))),
+            "status": rng.choice(STATUSES),
+            "priority": rng.choice(PRIORITIES),
+            "team": rng.choice(TEAMS),
+            "assignee": rng.choice(ASSIGNEES),
+            "labels": rng.sample(WORDS, rng.randint(0, 3)),
+            "created_at": created.isoformat(),
+            "due_date": (created + timedelta(days=rng.randint(1, 60))).date().isoformat(),
+            "estimate_hours": rng.randint(1, 40),
+        }
+
+
+def build_query(kind, variant, rng):
+    if kind == "full_text":
+        return {
+            "query": {
+                "multi_match": {
+                    "query": " ".join(rng.sample(WORDS, rng.randint(1, 2))),
+                    "fields": ["title^2", "description"],
+                }
+            },
+            "size": 20,
+        }
+
+    if kind == "filtered":
+        due_from = datetime(2025, 1, 1) + timedelta(days=rng.randint(0, 300))
+        return {
+            "query": {
+                "bool": {
+                    "must": [{"match": {"description": rng.choice(WORDS)}}],
+                    "filter": [
+                        {"term": {exact_field(variant, "status"): rng.choice(STATUSES)}},
+                        {"term": {exact_field(variant, "team"): rng.choice(TEAMS)}},
+                        {"range": {"due_date": {"gte": due_from.date().isoformat(), "lt": (due_from + timedelta(days=30)).date().isoformat()}}},
+                    ],
+                }
+            },
+            "size": 20,
+        }
+
+    if kind == "aggregation":
+        return {
+            "size": 0,
+            "query": {"term": {exact_field(variant, "team"): rng.choice(TEAMS)}},
+            "aggs": {
+                "by_status": {"terms": {"field": exact_field(variant, "status")}},
+                "by_assignee": {"terms": {"field": exact_field(variant, "assignee"), "size": 10}},
+                "per_week": {"date_histogram": {"field": "created_at", "calendar_interval": "week"}},
+                "estimate": {"stats": {"field": "estimate_hours"}},
+            },
+        }
+
+    word = rng.choice(WORDS)
+    typed = word[:rng.randint(2, max(2, len(word)))]
+    if variant["autocomplete"]:
+        query = {"match": {"title.autocomplete": typed}}
+    else:
+        query = {"match_phrase_prefix": {"title": typed}}
+    return {"query": query, "size": 10, "_source": ["title"]}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class Elasticsearch:
+    """Thin client over a keep-alive session so connection setup stays out of the timings"""
+
+    def __init__(self, url, user, password, timeout):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = Session()
+        self.session.auth = (user, password)
+
+    def clone(self):
+        """Same cluster and credentials on a separate connection"""
+        return Elasticsearch(self.url, *self.session.auth, self.timeout)
+
+    def request(self, method, path, body=None, ndjson=None):
+        headers = {}
+        data = None
+        if ndjson is not None:
+            headers["Content-Type"] = "application/x-ndjson"
+            data = ndjson
+        elif body is not None:
+            headers["Content-Type"] = "application/json"
+            data = json.dumps(body)
+
+        response = self.session.request(method, f"{self.url}{path}", data=data, headers=headers, timeout=self.timeout)
+        if response.status_code >= 400 and not (method == "DELETE" and response.status_code == 404):
+            raise RuntimeError(f"{method} {path} failed ({response.status_code}): {response.text[:300]}")
+        return response.json() if response.content else {}
+
+    def heap_used(self):
+        stats = self.request("GET", "/_nodes/stats/jvm")
+        used = sum(node["jvm"]["mem"]["heap_used_in_bytes"] for node in stats["nodes"].values())
+        limit = sum(node["jvm"]["mem"]["heap_max_in_bytes"] for node in stats["nodes"].values())
+        return used, limit
+
+
+class HeapSampler(threading.Thread):
+    """Polls JVM heap on its own connection so stats requests never delay scheduled queries"""
+
+    def __init__(self, es, interval):
+        super().__init__(daemon=True)
+        self.es = es.clone()
+        self.interval = interval
+        self.peak = 0
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                self.peak = max(self.peak, self.es.heap_used()[0])
+            except Exception:
+                pass
+            self._stopped.wait(self.interval)
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+        return self.peak
+
+
+def index_corpus(es, index, variant, args):
+    es.request("DELETE", f"/{index}")
+    es.request("PUT", f"/{index}", build_index_body(variant))
+
+    batch = []
+    started = time.perf_counter()
+    with tqdm(total=args.docs, desc="Indexing", ncols=80, colour="cyan", leave=False) as pbar:
+        for doc in generate_corpus(args.docs, args.seed):
+            batch.append(json.dumps({"index": {"_index": index, "_id": doc["id"]}}))
+            batch.append(json.dumps(doc))
+            if len(batch) >= args.batch_size * 2:
+                send_bulk(es, batch)
+                pbar.update(len(batch) // 2)
+                batch = []
+        if batch:
+            send_bulk(es, batch)
+            pbar.update(len(batch) // 2)
+
+    if variant["bulk_refresh_interval"]:
+        es.request("PUT", f"/{index}/_settings", {"index": {"refresh_interval": variant["refresh_interval"]}})
+    # Documents only count as indexed once they are searchable
+    es.request("POST", f"/{index}/_refresh")
+    return time.perf_counter() - started
+
+
+def send_bulk(es, lines):
+    result = es.request("POST", "/_bulk", ndjson="\n".join(lines) + "\n")
+    if result.get("errors"):
+        failed = next(item for item in result["items"] if "error" in item["index"])
+        raise RuntimeError(f"Bulk indexing failed: {failed['index']['error']}")
+
+
+def run_queries(es, index, variant, args):
+    rng = random.Random(args.seed)
+    kinds = list(QUERY_MIX)
+    weights = list(QUERY_MIX.values())
+
+    for _ in range(args.warmup):
+        kind = rng.choices(kinds, weights)[0]
+        es.request("POST", f"/{index}/_search", build_query(kind, variant, rng))
+
+    latencies = {kind: [] for kind in kinds}
+    interval = 1.0 / args.rate
+    sampler = HeapSampler(es, args.stats_interval)
+    sampler.start()
+    started = time.perf_counter()
+
+    try:
+        with tqdm(total=args.queries, desc="Querying", ncols=80, colour="cyan", leave=False) as pbar:
+            for i in range(args.queries):
+                kind = rng.choices(kinds, weights)[0]
+                body = build_query(kind, variant, rng)
+
+                # Fixed schedule: latency is measured from when the query was due, so a slow
+                # response also charges the queries that had to wait behind it
+                scheduled = started + i * interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+                es.request("POST", f"/{index}/_search", body)
+                latencies[kind].append((time.perf_counter() - scheduled) * 1000)
+                pbar.update(1)
+        elapsed = time.perf_counter() - started
+    finally:
+        heap_peak = sampler.stop()
+
+    return latencies, elapsed, heap_peak
+
+
+def benchmark_variant(es, name, variant, args):
+    index = f"{INDEX_PREFIX}-{name}"
+    console.print(f"[cyan]Variant {name}[/cyan] [dim]{json.dumps(variant)}[/dim]")
+
+    index_seconds = index_corpus(es, index, variant, args)
+    heap_after_index, heap_max = es.heap_used()
+    latencies, query_seconds, heap_peak = run_queries(es, index, variant, args)
+
+    stats = es.request("GET", f"/{index}/_stats/segments,store")["_all"]["total"]
+    all_latencies = [value for values in latencies.values() for value in values]
+
+    if not args.keep:
+        es.request("DELETE", f"/{index}")
+
+    return {
+        "variant": name,
+        "settings": variant,
+        "docs": args.docs,
+        "index_seconds": index_seconds,
+        "docs_per_second": args.docs / index_seconds,
+        "achieved_qps": args.queries / query_seconds,
+        "p50_ms": percentile(all_latencies, 50),
+        "p99_ms": percentile(all_latencies, 99),
+        "by_kind": {
+            kind: {"count": len(values), "p50_ms": percentile(values, 50), "p99_ms": percentile(values, 99)}
+            for kind, values in latencies.items()
+        },
+        "heap_after_index_bytes": heap_after_index,
+        "heap_peak_bytes": max(heap_peak, heap_after_index),
+        "heap_max_bytes": heap_max,
+        "segments": stats["segments"]["count"],
+        "store_bytes": stats["store"]["size_in_bytes"],
+    }
+
+
+def load_variants(args):
+    variants = dict(VARIANTS)
+    if args.variants_file:
+        try:
+            with open(args.variants_file) as f:
+                loaded = json.load(f)
+        except (OSError, ValueError) as e:
+            console.print(f"[red]Cannot read {args.variants_file}: {e}[/red]")
+            sys.exit(1)
+
+        errors = []
+        if not isinstance(loaded, dict):
+            errors.append("top level must be an object mapping variant names to settings")
+        else:
+            for name, overrides in loaded.items():
+                if not VARIANT_NAME.match(name):
+                    errors.append(f"{name!r}: not a valid index name (lowercase letters, digits, '-', '_', '.')")
+                if not isinstance(overrides, dict):
+                    errors.append(f"{name!r}: must be an object of settings")
+                    continue
+                unknown_keys = [key for key in overrides if key not in DEFAULT_VARIANT]
+                if unknown_keys:
+                    errors.append(f"{name!r}: unknown setting(s) {', '.join(unknown_keys)}")
+        if errors:
+            console.print(f"[red]Invalid variants file {args.variants_file}:[/red]")
+            for error in errors:
+                console.print(f"[red]  {error}[/red]")
+            console.print(f"[yellow]Settings: {', '.join(DEFAULT_VARIANT)}[/yellow]")
+            sys.exit(1)
+        variants.update(loaded)
+
+    selected = args.variant or list(variants)
+    unknown = [name for name in selected if name not in variants]
+    if unknown:
+        console.print(f"[red]Unknown variant(s): {', '.join(unknown)}[/red]")
+        console.print(f"[yellow]Available: {', '.join(variants)}[/yellow]")
+        sys.exit(1)
+
+    return {name: {**DEFAULT_VARIANT, **variants[name]} for name in selected}
+
+
+def mib(value):
+    return f"{value / 1024 / 1024:.0f} MiB"
+
+
+def print_results(results):
+    table = Table(show_header=True, header_style="bold cyan", title="Elasticsearch benchmark")
+    table.add_column("Variant", style="white")
+    table.add_column("Index docs/s", justify="right")
+    table.add_column("Search p50", justify="right")
+    table.add_column("Search p99", justify="right")
+    table.add_column("QPS", justify="right")
+    table.add_column("Heap peak", justify="right")
+    table.add_column("Segments", justify="right")
+    table.add_column("Store", justify="right")
+
+    for r in results:
+        table.add_row(
+            r["variant"],
+            f"{r['docs_per_second']:,.0f}",
+            f"{r['p50_ms']:.1f} ms",
+            f"{r['p99_ms']:.1f} ms",
+            f"{r['achieved_qps']:.1f}",
+            f"{mib(r['heap_peak_bytes'])} / {mib(r['heap_max_bytes'])}",
+            str(r["segments"]),
+            mib(r["store_bytes"]),
+        )
+    console.print(table)
+
+    kinds = Table(show_header=True, header_style="bold cyan", title="Search latency by query type (p50 / p99 ms)")
+    kinds.add_column("Variant", style="white")
+    for kind in QUERY_MIX:
+        kinds.add_column(kind, justify="right")
+    for r in results:
+        kinds.add_row(r["variant"], *(f"{r['by_kind'][k]['p50_ms']:.1f} / {r['by_kind'][k]['p99_ms']:.1f}" for k in QUERY_MIX))
+    console.print(kinds)
+
+
+def positive(kind):
+    def parse(value):
+        number = kind(value)
+        if number <= 0:
+            raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+        return number
+    return parse
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark task-search index settings against Elasticsearch")
+    parser.add_argument("--url", default="http://localhost:9200", help="Elasticsearch URL (k3d: kubectl port-forward svc/rtmc-elasticsearch 9200:9200)")
+    parser.add_argument("--user", default="elastic")
+    parser.add_argument("--password", default="elastic123")
+    parser.add_argument("--variant", action="append", help="Variant to run (repeatable, default: all)")
+    parser.add_argument("--variants-file", help="JSON file of extra/overriding variants: {name: {knob: value}}")
+    parser.add_argument("--docs", type=positive(int), default=50000, help="Documents to bulk index")
+    parser.add_argument("--batch-size", type=positive(int), default=1000, help="Documents per bulk request")
+    parser.add_argument("--queries", type=positive(int), default=2000, help="Measured search requests")
+    parser.add_argument("--warmup", type=int, default=200, help="Unmeasured search requests before measuring")
+    parser.add_argument("--rate", type=positive(float), default=50.0, help="Target search requests per second")
+    parser.add_argument("--stats-interval", type=positive(float), default=2.0, help="Seconds between JVM heap samples")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=positive(float), default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--keep", action="store_true", help="Keep benchmark indices afterwards")
+    parser.add_argument("--json", dest="json_path", help="Write raw results to this file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    variants = load_variants(args)
+    es = Elasticsearch(args.url, args.user, args.password, args.timeout)
+
+    try:
+        version = es.request("GET", "/")["version"]["number"]
+    except Exception as e:
+        console.print(f"[red]Cannot reach Elasticsearch at {args.url}: {e}[/red]")
+        console.print("[yellow]k3d: kubectl port-forward svc/rtmc-elasticsearch 9200:9200[/yellow]")
+        sys.exit(1)
+
+    console.print(f"\n[bold cyan]Elasticsearch {version} benchmark[/bold cyan]")
+    console.print(f"[dim]{args.docs} docs, {args.queries} queries at {args.rate}/s, mix {QUERY_MIX}[/dim]\n")
+
+    results = []
+    for name, variant in variants.items():
+        try:
+            results.append(benchmark_variant(es, name, variant, args))
+        except Exception as e:
+            console.print(f"[red]Variant {name} failed: {e}[/red]")
+            if not args.keep:
+                try:
+                    es.request("DELETE", f"/{INDEX_PREFIX}-{name}")
+                except Exception as cleanup_error:
+                    console.print(f"[yellow]Could not delete {INDEX_PREFIX}-{name}: {cleanup_error}[/yellow]")
+
+    if not results:
+        sys.exit(1)
+
+    console.print()
+    print_results(results)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+        console.print(f"\n[green]Results written to {args.json_path}[/green]")
+
+    sys.exit(0 if len(results) == len(variants) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,577 @@
+#!/usr/bin/env uv run
+# /// script
+# dependencies = [
+#   "pyyaml",
+#   "rich"
+# ]
+# ///
+
+# Shared Kubernetes API access for the infrastructure scripts.
+#
+# Talks to the API server over one keep-alive connection instead of spawning kubectl
+# per question, and keeps a watch-backed cache of the rtmc pods, deployments and
+# services so repeated reads are answered locally. Run directly for a `kubectl get
+# pods -o wide` / `kubectl get svc` style overview.
+
+import base64
+import http.client
+import json
+import os
+import socket
+import ssl
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+import yaml
+from rich.console import Console
+from rich.table import Table
+
+DEFAULT_SELECTOR = "app.kubernetes.io/instance=rtmc"
+
+RESOURCES = {
+    "pods": "/api/v1/namespaces/{namespace}/pods",
+    "deployments": "/apis/apps/v1/namespaces/{namespace}/deployments",
+    "services": "/api/v1/namespaces/{namespace}/services",
+}
+
+
+# Errors a keep-alive connection the server has already closed fails with on reuse
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+class ClusterError(Exception):
+    pass
+
+
+class ApiError(ClusterError):
+    def __init__(self, status, message):
+        super().__init__(f"API server returned {status}: {message}")
+        self.status = status
+
+
+class KubeConfig:
+    """Connection details for one kubeconfig context"""
+
+    def __init__(self, server, namespace="default", ssl_context=None, headers=None):
+        self.server = server.rstrip("/")
+        self.namespace = namespace
+        self.ssl_context = ssl_context
+        self.headers = headers or {}
+
+    @classmethod
+    def load(cls, path=None, context=None):
+        """Load `path`, or merge the KUBECONFIG files the way kubectl does (first definition wins)"""
+        if path:
+            paths = [path]
+        else:
+            paths = [p for p in os.environ.get("KUBECONFIG", "").split(os.pathsep) if p] or [os.path.expanduser("~/.kube/config")]
+
+        try:
+            return cls._load(paths, context)
+        except ClusterError:
+            raise
+        except (OSError, yaml.YAMLError, KeyError, TypeError, ValueError, AttributeError) as e:
+            raise ClusterError(f"invalid kubeconfig ({os.pathsep.join(paths)}): {e}") from e
+
+    @classmethod
+    def _load(cls, paths, context):
+        existing = [p for p in paths if os.path.exists(p)]
+        if not existing:
+            raise ClusterError(f"kubeconfig not found at {os.pathsep.join(paths)}")
+
+        current_context = None
+        named = {"clusters": {}, "contexts": {}, "users": {}}
+        for path in existing:
+            with open(path) as f:
+                config = yaml.safe_load(f) or {}
+            # Relative file references resolve against the file that defines them
+            base_dir = os.path.dirname(os.path.abspath(path))
+            current_context = current_context or config.get("current-context")
+            for section, kind in (("clusters", "cluster"), ("contexts", "context"), ("users", "user")):
+                for entry in config.get(section) or []:
+                    named[section].setdefault(entry["name"], (entry.get(kind) or {}, base_dir))
+
+        context_name = context or current_context
+        if not context_name:
+            raise ClusterError("kubeconfig has no current-context")
+        ctx, _ = _named(named, "contexts", context_name)
+        if not ctx.get("cluster"):
+            raise ClusterError(f"context '{context_name}' has no cluster")
+        cluster, cluster_dir = _named(named, "clusters", ctx["cluster"])
+        if not cluster.get("server"):
+            raise ClusterError(f"cluster '{ctx['cluster']}' has no server")
+        user, user_dir = _named(named, "users", ctx["user"]) if ctx.get("user") else ({}, None)
+
+        if "exec" in user or "auth-provider" in user:
+            raise ClusterError(f"user '{ctx.get('user')}' uses an exec/auth-provider plugin, which only kubectl supports")
+
+        headers = {}
+        if user.get("token") or user.get("tokenFile"):
+            token = user.get("token") or _read(_resolve(user_dir, user["tokenFile"])).decode().strip()
+            headers["Authorization"] = f"Bearer {token}"
+        elif user.get("username"):
+            credentials = f"{user['username']}:{user.get('password', '')}".encode()
+            headers["Authorization"] = f"Basic {base64.b64encode(credentials).decode()}"
+
+        ssl_context = None
+        if cluster["server"].startswith("https://"):
+            ssl_context = ssl.create_default_context()
+            if cluster.get("insecure-skip-tls-verify"):
+                ssl_context.check_hostname = False
+                ssl_context.verify_mode = ssl.CERT_NONE
+            else:
+                ca = _pem(cluster, "certificate-authority", cluster_dir)
+                if ca:
+                    ssl_context.load_verify_locations(cadata=ca.decode())
+
+            cert = _pem(user, "client-certificate", user_dir)
+            key = _pem(user, "client-key", user_dir)
+            if cert and key:
+                _load_cert_chain(ssl_context, cert, key)
+
+        return cls(cluster["server"], ctx.get("namespace", "default"), ssl_context, headers)
+
+
+def _named(named, section, name):
+    if name not in named[section]:
+        raise ClusterError(f"{section[:-1]} '{name}' not found in kubeconfig")
+    return named[section][name]
+
+
+def _resolve(base_dir, path):
+    return path if os.path.isabs(path) else os.path.join(base_dir, path)
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _pem(entry, field, base_dir):
+    if entry.get(f"{field}-data"):
+        return base64.b64decode(entry[f"{field}-data"])
+    if entry.get(field):
+        return _read(_resolve(base_dir, entry[field]))
+    return None
+
+
+def _load_cert_chain(ssl_context, cert, key):
+    # ssl only loads client certificates from files, so stage them privately and remove them right away
+    paths = []
+    try:
+        for pem in (cert, key):
+            fd, path = tempfile.mkstemp(prefix="rtmc-kube-", suffix=".pem")
+            paths.append(path)
+            with os.fdopen(fd, "wb") as f:
+                f.write(pem)
+        ssl_context.load_cert_chain(paths[0], paths[1])
+    finally:
+        for path in paths:
+            os.unlink(path)
+
+
+class ApiClient:
+    """HTTP client that keeps one connection to the API server open and reuses it"""
+
+    def __init__(self, config, timeout=10):
+        self.config = config
+        self.timeout = timeout
+        url = urlsplit(config.server)
+        self.https = url.scheme == "https"
+        self.host = url.hostname
+        self.port = url.port or (443 if self.https else 80)
+        self.base_path = url.path.rstrip("/")
+        self.round_trips = 0
+        self.connections = 0
+        self._conn = None
+        self._lock = threading.Lock()
+        # Watch threads update the counters too
+        self._stats_lock = threading.Lock()
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def counters(self):
+        with self._stats_lock:
+            return self.round_trips, self.connections
+
+    def _connect(self, timeout):
+        self._count("connections")
+        if self.https:
+            return http.client.HTTPSConnection(self.host, self.port, timeout=timeout, context=self.config.ssl_context)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def _headers(self, content_type=None):
+        headers = {"Accept": "application/json", "User-Agent": "rtmc-scripts", **self.config.headers}
+        if content_type:
+            headers["Content-Type"] = content_type
+        return headers
+
+    def _url(self, path, params):
+        return f"{self.base_path}{path}" + (f"?{urlencode(params)}" if params else "")
+
+    def request(self, method, path, params=None, body=None, content_type="application/json", raw=False):
+        data = json.dumps(body).encode() if body is not None else None
+        headers = self._headers(content_type if data is not None else None)
+
+        with self._lock:
+            while True:
+                reused = self._conn is not None
+                conn = self._conn or self._connect(self.timeout)
+                try:
+                    conn.request(method, self._url(path, params), body=data, headers=headers)
+                    response = conn.getresponse()
+                    payload = response.read()
+                except (OSError, http.client.HTTPException) as e:
+                    conn.close()
+                    self._conn = None
+                    # The server may have closed an idle keep-alive connection; retry once on a fresh one.
+                    # Anything else, timeouts included, may have reached the server and is not retried.
+                    if reused and isinstance(e, STALE_CONNECTION_ERRORS):
+                        continue
+                    raise ClusterError(f"cannot reach API server at {self.config.server}: {e}") from e
+
+                self._count("round_trips")
+                if response.will_close:
+                    conn.close()
+                    self._conn = None
+                else:
+                    self._conn = conn
+                break
+
+        if response.status >= 400:
+            try:
+                message = json.loads(payload).get("message", "")
+            except ValueError:
+                message = payload.decode(errors="replace")[:200]
+            raise ApiError(response.status, message)
+
+        if raw:
+            return payload
+        return json.loads(payload) if payload else {}
+
+    def watch(self, path, params, on_open=None):
+        """Yield watch events; a watch holds its connection, so it gets a dedicated one"""
+        conn = self._connect(None)
+        if on_open:
+            on_open(conn)
+        try:
+            conn.request("GET", self._url(path, {**params, "watch": "1"}), headers=self._headers())
+            response = conn.getresponse()
+            self._count("round_trips")
+            if response.status >= 400:
+                raise ApiError(response.status, response.read().decode(errors="replace")[:200])
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            conn.close()
+
+    def close(self):
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
+
+
+class Informer:
+    """List once, then follow a watch to keep `items` in sync"""
+
+    def __init__(self, client, path, selector, condition):
+        self.client = client
+        self.path = path
+        self.selector = selector
+        self.condition = condition
+        self.items = {}
+        self.resource_version = None
+        self._stopped = threading.Event()
+        self._watch_conn = None
+        self._thread = None
+
+    def _params(self):
+        return {"labelSelector": self.selector} if self.selector else {}
+
+    def list(self):
+        data = self.client.request("GET", self.path, self._params())
+        with self.condition:
+            self.items = {item["metadata"]["name"]: item for item in data.get("items", [])}
+            self.resource_version = data["metadata"].get("resourceVersion")
+            self.condition.notify_all()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        conn = self._watch_conn
+        if conn is not None and conn.sock is not None:
+            try:
+                conn.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _on_open(self, conn):
+        self._watch_conn = conn
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                params = {**self._params(), "allowWatchBookmarks": "true", "timeoutSeconds": 300}
+                if self.resource_version:
+                    params["resourceVersion"] = self.resource_version
+                for event in self.client.watch(self.path, params, self._on_open):
+                    if self._stopped.is_set():
+                        return
+                    if not self._apply(event):
+                        # resourceVersion expired (410 Gone): start over from a fresh list
+                        self.list()
+                        break
+            except (ClusterError, OSError, http.client.HTTPException, ValueError):
+                if self._stopped.wait(1):
+                    return
+                try:
+                    self.list()
+                except (ClusterError, OSError):
+                    pass
+
+    def _apply(self, event):
+        kind = event.get("type")
+        obj = event.get("object", {})
+        if kind == "ERROR":
+            return False
+
+        with self.condition:
+            self.resource_version = obj.get("metadata", {}).get("resourceVersion", self.resource_version)
+            if kind in ("ADDED", "MODIFIED"):
+                self.items[obj["metadata"]["name"]] = obj
+            elif kind == "DELETED":
+                self.items.pop(obj["metadata"]["name"], None)
+            self.condition.notify_all()
+        return True
+
+
+def is_pod_ready(pod):
+    conditions = pod.get("status", {}).get("conditions", [])
+    return any(c["type"] == "Ready" and c["status"] == "True" for c in conditions)
+
+
+def is_rollout_complete(deployment, generation=0):
+    """Same checks as `kubectl rollout status`, optionally for at least `generation`"""
+    spec = deployment.get("spec", {})
+    status = deployment.get("status", {})
+    desired = spec.get("replicas", 1)
+    updated = status.get("updatedReplicas", 0)
+    generation = max(generation, deployment["metadata"].get("generation", 0))
+    return (
+        status.get("observedGeneration", 0) >= generation
+        and updated == desired
+        and status.get("replicas", 0) == updated
+        and status.get("availableReplicas", 0) == updated
+    )
+
+
+class Cluster:
+    """Cached view of one namespace, shared by the scripts in place of kubectl calls"""
+
+    def __init__(self, namespace=None, selector=DEFAULT_SELECTOR, resources=tuple(RESOURCES),
+                 watch=True, kubeconfig=None, context=None):
+        config = KubeConfig.load(kubeconfig, context)
+        self.namespace = namespace or config.namespace
+        self.client = ApiClient(config)
+        self.watch = watch
+        self.condition = threading.Condition()
+        self.informers = {
+            kind: Informer(self.client, RESOURCES[kind].format(namespace=self.namespace), selector, self.condition)
+            for kind in resources
+        }
+        # Each public query replaces one kubectl invocation and is answered either from the
+        # cache or with a single direct API request
+        self.cache_hits = 0
+        self.direct_requests = 0
+        self._started = False
+
+    def start(self):
+        if self._started:
+            return self
+        self._started = True
+        for informer in self.informers.values():
+            informer.list()
+        if self.watch:
+            for informer in self.informers.values():
+                informer.start()
+        return self
+
+    def close(self):
+        for informer in self.informers.values():
+            informer.stop()
+        self.client.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _cached(self, kind):
+        self.cache_hits += 1
+        with self.condition:
+            items = list(self.informers[kind].items.values())
+        return sorted(items, key=lambda item: (item["metadata"].get("creationTimestamp", ""), item["metadata"]["name"]))
+
+    def pods(self, component=None):
+        pods = self._cached("pods")
+        if component:
+            pods = [p for p in pods if p["metadata"].get("labels", {}).get("app.kubernetes.io/component") == component]
+        return pods
+
+    def deployments(self):
+        return self._cached("deployments")
+
+    def services(self):
+        return self._cached("services")
+
+    def pod(self, component):
+        """The component's pod to talk to: not terminating, Ready ones first, then oldest"""
+        pods = [p for p in self.pods(component) if not p["metadata"].get("deletionTimestamp")]
+        ready = [p for p in pods if is_pod_ready(p)]
+        return (ready or pods or [None])[0]
+
+    def pod_name(self, component):
+        pod = self.pod(component)
+        return pod["metadata"]["name"] if pod else None
+
+    def pod_status(self, component):
+        """(ready, phase) of the pod `pod()` picks"""
+        pod = self.pod(component)
+        if not pod:
+            return False, "Not Found"
+
+        phase = pod.get("status", {}).get("phase", "Unknown")
+        if phase == "Running":
+            return (True, "Running") if is_pod_ready(pod) else (False, "Starting")
+        if phase == "ContainerCreating":
+            return False, "Creating"
+        return False, phase
+
+    def wait_for(self, kind, predicate, timeout):
+        """Block until predicate(items) holds, woken by watch events rather than polling"""
+        self.cache_hits += 1
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while True:
+                if predicate(list(self.informers[kind].items.values())):
+                    return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+
+    def wait_for_pods_ready(self, timeout=120):
+        return self.wait_for("pods", lambda pods: bool(pods) and all(is_pod_ready(p) for p in pods), timeout)
+
+    def rollout_restart(self, deployment):
+        """Patch the restart annotation and return the generation the rollout must reach"""
+        self.direct_requests += 1
+        restarted_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        patch = {"spec": {"template": {"metadata": {"annotations": {"kubectl.kubernetes.io/restartedAt": restarted_at}}}}}
+        path = f"{RESOURCES['deployments'].format(namespace=self.namespace)}/{deployment}"
+        patched = self.client.request("PATCH", path, body=patch, content_type="application/strategic-merge-patch+json")
+        return patched["metadata"]["generation"]
+
+    def rollout_status(self, deployment, generation=0, timeout=300):
+        """Wait for the rollout of `generation`; the cache may still hold the pre-restart object"""
+        with self.condition:
+            if deployment not in self.informers["deployments"].items:
+                return False
+
+        def done(deployments):
+            return any(d["metadata"]["name"] == deployment and is_rollout_complete(d, generation) for d in deployments)
+        return self.wait_for("deployments", done, timeout)
+
+    def service_proxy(self, service, port, path):
+        """GET a path on a ClusterIP service through the API server, no port-forward needed"""
+        self.direct_requests += 1
+        return self.client.request("GET", f"/api/v1/namespaces/{self.namespace}/services/{service}:{port}/proxy{path}", raw=True)
+
+    def stats(self):
+        round_trips, connections = self.client.counters()
+        return {
+            "kubectl_calls_replaced": self.cache_hits + self.direct_requests,
+            "cache_hits": self.cache_hits,
+            "direct_requests": self.direct_requests,
+            # List and watch requests that fill the cache, paid once per resource
+            "setup_round_trips": round_trips - self.direct_requests,
+            "round_trips": round_trips,
+            "connections": connections,
+        }
+
+    def summary(self):
+        s = self.stats()
+        return (f"{s['kubectl_calls_replaced']} kubectl calls replaced: {s['cache_hits']} answered from cache, "
+                f"{s['direct_requests']} as direct API requests; {s['round_trips']} API round-trips in total "
+                f"({s['setup_round_trips']} for list/watch) over {s['connections']} connection(s)")
+
+
+def age(timestamp):
+    if not timestamp:
+        return "-"
+    seconds = int((datetime.now(timezone.utc) - datetime.fromisoformat(timestamp.replace("Z", "+00:00"))).total_seconds())
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{seconds // size}{unit}"
+    return f"{seconds}s"
+
+
+def pods_table(pods):
+    """Rich table with the columns of `kubectl get pods -o wide`"""
+    table = Table(show_header=True, header_style="bold cyan")
+    for column in ("Name", "Ready", "Status", "Restarts", "Age", "IP", "Node"):
+        table.add_column(column)
+    for pod in pods:
+        statuses = pod.get("status", {}).get("containerStatuses", [])
+        ready = sum(1 for c in statuses if c.get("ready"))
+        table.add_row(
+            pod["metadata"]["name"],
+            f"{ready}/{len(pod['spec']['containers'])}",
+            "[green]Running[/green]" if is_pod_ready(pod) else f"[yellow]{pod.get('status', {}).get('phase', 'Unknown')}[/yellow]",
+            str(sum(c.get("restartCount", 0) for c in statuses)),
+            age(pod["metadata"].get("creationTimestamp")),
+            pod.get("status", {}).get("podIP", "-"),
+            pod["spec"].get("nodeName", "-"),
+        )
+    return table
+
+
+def main():
+    console = Console()
+    try:
+        # Whole namespace, like `kubectl get pods` / `kubectl get svc`, not just rtmc objects
+        cluster = Cluster(selector=None, resources=("pods", "services"), watch=False).start()
+    except ClusterError as e:
+        console.print(f"[red]{e}[/red]")
+        sys.exit(1)
+
+    console.print("[cyan]=== k3d Cluster Status ===[/cyan]")
+    console.print(pods_table(cluster.pods()))
+
+    console.print("\n[cyan]=== Services ===[/cyan]")
+    services = Table(show_header=True, header_style="bold cyan")
+    for column in ("Name", "Type", "Cluster IP", "Ports", "Age"):
+        services.add_column(column)
+    for svc in cluster.services():
+        ports = ",".join(f"{p['port']}/{p.get('protocol', 'TCP')}" for p in svc["spec"].get("ports", []))
+        services.add_row(svc["metadata"]["name"], svc["spec"].get("type", "-"), svc["spec"].get("clusterIP", "-"), ports,
+                         age(svc["metadata"].get("creationTimestamp")))
+    console.print(services)
+
+    console.print(f"\n[dim]{cluster.summary()}[/dim]")
+    cluster.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+#!/usr/bin/env uv run
+# /// script
+# dependencies = [
+#   "pyyaml",
+#   "rich"
+# ]
+# ///
+
+# Minimal stand-in for the Kubernetes API server, enough to exercise cluster.py and the
+# scripts built on it without a k3d cluster. Serves list/watch for pods, deployments and
+# services seeded with the rtmc components, rollout-restart patches and service proxies.
+#
+#   uv run infrastructure/scripts/k8s/fake_apiserver.py --kubeconfig /tmp/fake-kubeconfig
+#   KUBECONFIG=/tmp/fake-kubeconfig uv run infrastructure/scripts/k8s/cluster.py
+
+import argparse
+import copy
+import json
+import queue
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import yaml
+from rich.console import Console
+
+console = Console()
+
+COMPONENTS = {
+    "postgres": 5432,
+    "redis": 6379,
+    "kafka": 9092,
+    "rabbitmq": 5672,
+    "elasticsearch": 9200,
+    "grafana": 3000,
+    "api": 8080,
+    "frontend": 3001,
+}
+
+PATHS = {
+    "/api/v1/namespaces/{namespace}/pods": "pods",
+    "/apis/apps/v1/namespaces/{namespace}/deployments": "deployments",
+    "/api/v1/namespaces/{namespace}/services": "services",
+}
+
+
+class Store:
+    """Objects per kind plus the open watches that need to hear about changes"""
+
+    def __init__(self, namespace, rollout_delay):
+        self.namespace = namespace
+        self.rollout_delay = rollout_delay
+        self.lock = threading.Lock()
+        self.version = 0
+        self.objects = {"pods": {}, "deployments": {}, "services": {}}
+        self.watchers = []
+        # (resourceVersion, kind, event) so a watch can resume from a list's resourceVersion
+        self.history = []
+        self.requests = 0
+        self.connections = 0
+        self.seed()
+
+    def next_version(self):
+        self.version += 1
+        return str(self.version)
+
+    def meta(self, name, component):
+        return {
+            "name": name,
+            "namespace": self.namespace,
+            "creationTimestamp": datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z"),
+            "labels": {"app.kubernetes.io/instance": "rtmc", "app.kubernetes.io/component": component},
+            "resourceVersion": self.next_version(),
+        }
+
+    def seed(self):
+        for i, (component, port) in enumerate(COMPONENTS.items()):
+            name = f"rtmc-{component}"
+            self.objects["deployments"][name] = {
+                "metadata": {**self.meta(name, component), "generation": 1},
+                "spec": {"replicas": 1, "template": {"metadata": {"annotations": {}}}},
+                "status": {"observedGeneration": 1, "replicas": 1, "updatedReplicas": 1, "availableReplicas": 1},
+            }
+            self.objects["services"][name] = {
+                "metadata": self.meta(name, component),
+                "spec": {"type": "ClusterIP", "clusterIP": f"10.43.0.{10 + i}", "ports": [{"port": port, "protocol": "TCP"}]},
+            }
+            self.add_pod(component, f"10.42.0.{10 + i}")
+
+    def add_pod(self, component, ip):
+        name = f"rtmc-{component}-{self.version:05d}"
+        self.objects["pods"][name] = {
+            "metadata": self.meta(name, component),
+            "spec": {"containers": [{"name": component}], "nodeName": "k3d-rtmc-server-0"},
+            "status": {
+                "phase": "Running",
+                "podIP": ip,
+                "conditions": [{"type": "Ready", "status": "True"}],
+                "containerStatuses": [{"name": component, "ready": True, "restartCount": 0}],
+            },
+        }
+        return self.objects["pods"][name]
+
+    def publish(self, kind, event_type, obj):
+        obj["metadata"]["resourceVersion"] = self.next_version()
+        event = {"type": event_type, "object": copy.deepcopy(obj)}
+        self.history.append((self.version, kind, event))
+        for watcher_kind, events in self.watchers:
+            if watcher_kind == kind:
+                events.put(event)
+
+    def restart(self, name):
+        """Simulate a rolling restart: bump generation, swap the pod, then report the rollout done"""
+        with self.lock:
+            deployment = self.objects["deployments"][name]
+            deployment["metadata"]["generation"] += 1
+            deployment["status"]["updatedReplicas"] = 0
+            self.publish("deployments", "MODIFIED", deployment)
+        threading.Timer(self.rollout_delay, self.finish_restart, args=(name,)).start()
+        return deployment
+
+    def finish_restart(self, name):
+        with self.lock:
+            deployment = self.objects["deployments"][name]
+            component = deployment["metadata"]["labels"]["app.kubernetes.io/component"]
+            old = [p for p in self.objects["pods"].values() if p["metadata"]["labels"]["app.kubernetes.io/component"] == component]
+            pod = self.add_pod(component, old[0]["status"]["podIP"] if old else "10.42.0.99")
+            self.publish("pods", "ADDED", pod)
+            for p in old:
+                del self.objects["pods"][p["metadata"]["name"]]
+                self.publish("pods", "DELETED", p)
+            deployment["status"].update({"observedGeneration": deployment["metadata"]["generation"], "updatedReplicas": 1})
+            self.publish("deployments", "MODIFIED", deployment)
+
+
+def matches(obj, selector):
+    labels = obj["metadata"].get("labels", {})
+    for requirement in filter(None, (selector or "").split(",")):
+        key, _, value = requirement.partition("=")
+        if labels.get(key) != value:
+            return False
+    return True
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    store = None
+
+    def setup(self):
+        super().setup()
+        self.store.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def not_found(self):
+        self.send_json(404, {"kind": "Status", "status": "Failure", "message": f"{self.path} not found", "code": 404})
+
+    def route(self):
+        url = urlsplit(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        for template, kind in PATHS.items():
+            base = template.format(namespace=self.store.namespace)
+            if url.path == base:
+                return kind, None, params
+            if url.path.startswith(base + "/"):
+                return kind, url.path[len(base) + 1:], params
+        return None, url.path, params
+
+    def do_GET(self):
+        self.store.requests += 1
+        if "/proxy/" in self.path:
+            return self.send_json(200, {"database": "ok"})
+
+        kind, name, params = self.route()
+        if kind is None:
+            return self.not_found()
+
+        selector = params.get("labelSelector")
+        if params.get("watch") in ("1", "true"):
+            return self.watch(kind, selector, params.get("resourceVersion"))
+
+        with self.store.lock:
+            if name:
+                obj = self.store.objects[kind].get(name)
+                return self.send_json(200, obj) if obj else self.not_found()
+            items = [o for o in self.store.objects[kind].values() if matches(o, selector)]
+            version = str(self.store.version)
+        self.send_json(200, {"kind": "List", "metadata": {"resourceVersion": version}, "items": items})
+
+    def do_PATCH(self):
+        self.store.requests += 1
+        kind, name, _ = self.route()
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if kind != "deployments" or name not in self.store.objects["deployments"]:
+            return self.not_found()
+        self.send_json(200, self.store.restart(name))
+
+    def watch(self, kind, selector, resource_version):
+        events = queue.Queue()
+        with self.store.lock:
+            # Replay what happened since the client's list, like the real API server does
+            since = int(resource_version or self.store.version)
+            for version, event_kind, event in self.store.history:
+                if version > since and event_kind == kind:
+                    events.put(event)
+            self.store.watchers.append((kind, events))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            while True:
+                try:
+                    event = events.get(timeout=5)
+                except queue.Empty:
+                    event = {"type": "BOOKMARK", "object": {"metadata": {"resourceVersion": str(self.store.version)}}}
+                else:
+                    if not matches(event["object"], selector):
+                        continue
+                line = json.dumps(event).encode() + b"\n"
+                self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self.store.lock:
+                self.store.watchers.remove((kind, events))
+            self.close_connection = True
+
+
+def write_kubeconfig(path, url, namespace):
+    config = {
+        "apiVersion": "v1",
+        "kind": "Config",
+        "current-context": "fake-rtmc",
+        "clusters": [{"name": "fake-rtmc", "cluster": {"server": url}}],
+        "contexts": [{"name": "fake-rtmc", "context": {"cluster": "fake-rtmc", "user": "fake-rtmc", "namespace": namespace}}],
+        "users": [{"name": "fake-rtmc", "user": {"token": "fake-token"}}],
+    }
+    with open(path, "w") as f:
+        yaml.safe_dump(config, f)
+
+
+def make_server(store, host="127.0.0.1", port=0):
+    """HTTP server bound to `store`; port 0 picks a free port"""
+    handler = type("StoreHandler", (Handler,), {"store": store})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Kubernetes API server for testing the cluster scripts")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--namespace", default="default")
+    parser.add_argument("--kubeconfig", help="Write a kubeconfig pointing at this server to this path")
+    parser.add_argument("--rollout-delay", type=float, default=1.0, help="Seconds a simulated rollout restart takes")
+    args = parser.parse_args()
+
+    store = Store(args.namespace, args.rollout_delay)
+    server = make_server(store, args.host, args.port)
+    url = f"http://{args.host}:{server.server_address[1]}"
+
+    if args.kubeconfig:
+        write_kubeconfig(args.kubeconfig, url, args.namespace)
+        console.print(f"[green]Kubeconfig written to {args.kubeconfig}[/green]")
+
+    console.print(f"[cyan]Fake API server listening on {url}[/cyan] [dim](Ctrl+C to stop)[/dim]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        console.print(f"\n[dim]Served {store.requests} requests over {store.connections} connections[/dim]")
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 #!/usr/bin/env uv run
 # /// script
 # dependencies = [
+#   "pyyaml",
 #   "rich"
 # ]
 # ///
@@ -8,6 +9,7 @@
 import subprocess
 import sys
 from rich.console import Console
+from cluster import Cluster, ClusterError, pods_table
 
 console = Console()
 
@@ -41,15 +43,18 @@ def main():
     console.print("\n[green]nginx-ingress installed successfully![/green]\n")
 
     console.print("[cyan]Waiting for ingress controller to be ready...[/cyan]")
-    subprocess.run([
-        "kubectl", "wait", "--namespace", "ingress-nginx",
-        "--for=condition=ready", "pod",
-        "--selector=app.kubernetes.io/component=controller",
-        "--timeout=120s"
-    ])
-
-    console.print("\n[cyan]Ingress controller status:[/cyan]")
-    subprocess.run(["kubectl", "get", "pods", "-n", "ingress-nginx"])
+    try:
+        cluster = Cluster(namespace="ingress-nginx", selector="app.kubernetes.io/component=controller", resources=("pods",)).start()
+    except ClusterError as e:
+        console.print(f"[red]Cannot query the cluster: {e}[/red]")
+        sys.exit(1)
+
+    with cluster:
+        if not cluster.wait_for_pods_ready(timeout=120):
+            console.print("[yellow]Ingress controller not ready after 120s[/yellow]")
+
+        console.print("\n[cyan]Ingress controller status:[/cyan]")
+        console.print(pods_table(cluster.pods()))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,52 @@
+#!/usr/bin/env uv run
+# /// script
+# dependencies = [
+#   "pyyaml",
+#   "rich"
+# ]
+# ///
+
+import argparse
+import sys
+from rich.console import Console
+from cluster import Cluster, ClusterError
+
+console = Console()
+
+def main():
+    parser = argparse.ArgumentParser(description="Restart deployments and wait for their rollouts")
+    parser.add_argument("deployments", nargs="+")
+    parser.add_argument("--timeout", type=int, default=300, help="Seconds to wait per deployment")
+    args = parser.parse_args()
+
+    try:
+        cluster = Cluster(resources=("deployments",)).start()
+    except ClusterError as e:
+        console.print(f"[red]{e}[/red]")
+        sys.exit(1)
+
+    ok = True
+    with cluster:
+        generations = {}
+        for name in args.deployments:
+            try:
+                generations[name] = cluster.rollout_restart(name)
+            except ClusterError as e:
+                console.print(f"[red]Failed to restart {name}: {e}[/red]")
+                ok = False
+                continue
+            console.print(f"[cyan]deployment.apps/{name} restarted[/cyan]")
+
+        for name, generation in generations.items():
+            if cluster.rollout_status(name, generation, args.timeout):
+                console.print(f"[green]deployment \"{name}\" successfully rolled out[/green]")
+            else:
+                console.print(f"[red]deployment \"{name}\" did not finish rolling out within {args.timeout}s[/red]")
+                ok = False
+
+        console.print(f"[dim]{cluster.summary()}[/dim]")
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env uv run
+# /// script
+# dependencies = [
+#   "pyyaml",
+#   "rich"
+# ]
+# ///
+
+# Tests for cluster.py against fake_apiserver.py on an ephemeral port.
+#
+#   uv run infrastructure/scripts/k8s/test_cluster.py
+
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from cluster import ApiClient, Cluster, ClusterError, KubeConfig
+from fake_apiserver import COMPONENTS, Store, make_server, write_kubeconfig
+
+
+class FakeApiServerTest(unittest.TestCase):
+    def setUp(self):
+        self.store = Store("default", rollout_delay=0.3)
+        self.server = make_server(self.store)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.kubeconfig = os.path.join(self.tmp.name, "config")
+        write_kubeconfig(self.kubeconfig, f"http://127.0.0.1:{self.server.server_address[1]}", "default")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def cluster(self, **kwargs):
+        cluster = Cluster(kubeconfig=self.kubeconfig, **kwargs).start()
+        self.addCleanup(cluster.close)
+        return cluster
+
+    def test_list_fills_cache(self):
+        cluster = self.cluster(watch=False)
+
+        self.assertEqual(len(cluster.pods()), len(COMPONENTS))
+        self.assertEqual(len(cluster.deployments()), len(COMPONENTS))
+        self.assertEqual(cluster.pod_status("api"), (True, "Running"))
+        self.assertEqual(cluster.pod_status("missing"), (False, "Not Found"))
+
+    def test_watch_keeps_pods_current(self):
+        cluster = self.cluster()
+        old = cluster.pod_name("redis")
+
+        self.store.restart("rtmc-redis")
+
+        names = lambda pods: {p["metadata"]["name"] for p in pods}
+        self.assertTrue(cluster.wait_for("pods", lambda pods: old not in names(pods), timeout=5))
+        self.assertNotEqual(cluster.pod_name("redis"), old)
+        self.assertEqual(len(cluster.pods("redis")), 1)
+
+    def test_rollout_status_waits_for_restarted_generation(self):
+        cluster = self.cluster()
+        old = cluster.pod_name("api")
+
+        generation = cluster.rollout_restart("rtmc-api")
+        self.assertEqual(generation, 2)
+        self.assertTrue(cluster.rollout_status("rtmc-api", generation, timeout=5))
+
+        deployment = next(d for d in cluster.deployments() if d["metadata"]["name"] == "rtmc-api")
+        self.assertGreaterEqual(deployment["status"]["observedGeneration"], generation)
+        # Pods arrive on their own watch, so the replacement may land just after the deployment update
+        self.assertTrue(cluster.wait_for("pods", lambda pods: old not in {p["metadata"]["name"] for p in pods}, timeout=5))
+        self.assertTrue(cluster.wait_for_pods_ready(timeout=5))
+
+    def test_rollout_status_does_not_trust_stale_cache(self):
+        # Without a watch the cache keeps the pre-restart deployment, which on its own looks rolled out
+        cluster = self.cluster(watch=False)
+
+        generation = cluster.rollout_restart("rtmc-api")
+
+        self.assertFalse(cluster.rollout_status("rtmc-api", generation, timeout=0.5))
+
+    def test_rollout_status_returns_at_once_for_unknown_deployment(self):
+        cluster = self.cluster()
+
+        with self.assertRaises(ClusterError):
+            cluster.rollout_restart("rtmc-missing")
+        started = time.monotonic()
+        self.assertFalse(cluster.rollout_status("rtmc-missing", timeout=30))
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_pod_skips_terminating_and_prefers_ready(self):
+        cluster = self.cluster()
+        with self.store.lock:
+            old = next(p for p in self.store.objects["pods"].values() if p["metadata"]["name"] == cluster.pod_name("api"))
+            old["metadata"]["deletionTimestamp"] = "2025-01-01T00:00:00Z"
+            self.store.publish("pods", "MODIFIED", old)
+            starting = self.store.add_pod("api", "10.42.0.50")
+            starting["status"]["conditions"] = [{"type": "Ready", "status": "False"}]
+            self.store.publish("pods", "ADDED", starting)
+            ready = self.store.add_pod("api", "10.42.0.51")
+            self.store.publish("pods", "ADDED", ready)
+
+        self.assertTrue(cluster.wait_for("pods", lambda pods: len(pods) == len(COMPONENTS) + 2, timeout=5))
+        self.assertEqual(cluster.pod_name("api"), ready["metadata"]["name"])
+
+    def test_stats_count_round_trips_and_replaced_calls(self):
+        cluster = self.cluster()
+        for component in COMPONENTS:
+            cluster.pod_status(component)
+        cluster.service_proxy("rtmc-grafana", 3000, "/api/health")
+
+        # Watches connect in the background; the counters settle once all three are open
+        deadline = time.monotonic() + 5
+        while cluster.stats()["round_trips"] < 7 and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        stats = cluster.stats()
+        self.assertEqual(stats["cache_hits"], len(COMPONENTS))
+        self.assertEqual(stats["direct_requests"], 1)
+        self.assertEqual(stats["kubectl_calls_replaced"], len(COMPONENTS) + 1)
+        # One list and one watch per resource, plus the proxied request
+        self.assertEqual(stats["setup_round_trips"], 6)
+        self.assertEqual(stats["round_trips"], 7)
+        # Lists and the proxy share the pooled connection; each watch holds its own
+        self.assertEqual(stats["connections"], 4)
+
+
+class ApiClientRetryTest(unittest.TestCase):
+    """Raw socket server so a test can close or stall a keep-alive connection on cue"""
+
+    def setUp(self):
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.addCleanup(self.listener.close)
+        self.requests = 0
+        self.connections = 0
+        self.client = ApiClient(KubeConfig(f"http://127.0.0.1:{self.listener.getsockname()[1]}"), timeout=0.5)
+        self.addCleanup(self.client.close)
+
+    def serve(self, handle):
+        """Accept connections in the background; `handle(n)` decides what to do with request n"""
+        def connection(conn):
+            with conn:
+                while conn.recv(65536):
+                    self.requests += 1
+                    action = handle(self.requests)
+                    if action == "hang":
+                        time.sleep(2)
+                        return
+                    conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 2\r\n\r\n{}")
+                    if action == "close":
+                        # Answer as keep-alive, then drop the connection like an idle timeout would
+                        conn.shutdown(socket.SHUT_RDWR)
+                        return
+
+        def accept():
+            while True:
+                try:
+                    conn, _ = self.listener.accept()
+                except OSError:
+                    return
+                self.connections += 1
+                threading.Thread(target=connection, args=(conn,), daemon=True).start()
+
+        threading.Thread(target=accept, daemon=True).start()
+
+    def test_retries_once_when_server_closed_idle_connection(self):
+        self.serve(lambda n: "close" if n == 1 else "ok")
+
+        self.assertEqual(self.client.request("GET", "/api/v1/pods"), {})
+        time.sleep(0.1)
+        self.assertEqual(self.client.request("GET", "/api/v1/pods"), {})
+        self.assertEqual(self.requests, 2)
+        self.assertEqual(self.connections, 2)
+
+    def test_does_not_retry_timeout_on_reused_connection(self):
+        self.serve(lambda n: "hang" if n == 2 else "ok")
+
+        self.client.request("GET", "/api/v1/pods")
+        with self.assertRaises(ClusterError):
+            self.client.request("GET", "/api/v1/pods")
+        time.sleep(0.2)
+        self.assertEqual(self.requests, 2)
+        self.assertEqual(self.connections, 1)
+
+
+class KubeConfigTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_malformed_kubeconfig_raises_cluster_error(self):
+        cases = {
+            "yaml": "clusters: [unclosed",
+            "no-cluster": "current-context: a\ncontexts:\n- name: a\n  context: {user: u}\n",
+            "no-server": "current-context: a\ncontexts:\n- name: a\n  context: {cluster: c}\nclusters:\n- name: c\n  cluster: {}\n",
+            "bad-ca": ("current-context: a\ncontexts:\n- name: a\n  context: {cluster: c}\nclusters:\n- name: c\n"
+                       "  cluster: {server: 'https://127.0.0.1', certificate-authority-data: Zm9vYmFy}\n"),
+        }
+        for name, content in cases.items():
+            with self.subTest(name):
+                with self.assertRaises(ClusterError):
+                    KubeConfig.load(self.write(name, content))
+
+    def test_kubeconfig_files_are_merged(self):
+        first = self.write("first", "current-context: a\ncontexts:\n- name: a\n  context: {cluster: c, user: u, namespace: rtmc}\n")
+        second = self.write("second", ("current-context: other\nclusters:\n- name: c\n  cluster: {server: 'http://127.0.0.1:1'}\n"
+                                       "users:\n- name: u\n  user: {tokenFile: token}\n"))
+        self.write("token", "secret\n")
+
+        old = os.environ.get("KUBECONFIG")
+        os.environ["KUBECONFIG"] = os.pathsep.join([os.path.join(self.tmp.name, "missing"), first, second])
+        try:
+            config = KubeConfig.load()
+        finally:
+            if old is None:
+                del os.environ["KUBECONFIG"]
+            else:
+                os.environ["KUBECONFIG"] = old
+
+        self.assertEqual(config.server, "http://127.0.0.1:1")
+        self.assertEqual(config.namespace, "rtmc")
+        self.assertEqual(config.headers["Authorization"], "Bearer secret")
+
+
+if __name__ == "__main__":
+    unittest.main()
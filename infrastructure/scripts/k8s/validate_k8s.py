@@ -2,6 +2,7 @@
 # /// script
 # dependencies = [
 #   "loguru",
+#   "pyyaml",
 #   "tqdm",
 #   "rich"
 # ]
@@ -14,6 +15,7 @@ from loguru import logger
 from tqdm import tqdm
 from rich.console import Console
 from rich.table import Table
+from cluster import Cluster, ClusterError
 
 console = Console()
 logger.remove()
@@ -23,55 +25,46 @@ def run_cmd(cmd):
     result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
     return result.returncode == 0, result.stdout.strip()
 
-def get_pod_status(component):
-    success, output = run_cmd(f"kubectl get pods -l app.kubernetes.io/component={component} -o jsonpath='{{.items[0].status.phase}}'")
-    if not success or not output:
-        return False, "Not Found"
-
-    if output == "Running":
-        ready_success, ready_status = run_cmd(
-            f"kubectl get pods -l app.kubernetes.io/component={component} -o jsonpath='{{.items[0].status.conditions[?(@.type==\"Ready\")].status}}'"
-        )
-        if ready_success and ready_status == "True":
-            return True, "Running"
-        else:
-            return False, "Starting"
-    elif output == "Pending":
-        return False, "Pending"
-    elif output == "ContainerCreating":
-        return False, "Creating"
-
-    return False, output
-
-def test_postgres():
-    success, _ = run_cmd("kubectl exec $(kubectl get pod -l app.kubernetes.io/component=postgres -o jsonpath='{.items[0].metadata.name}') -- pg_isready -U admin -d TaskManagementDb 2>/dev/null")
+def exec_in(cluster, component, command):
+    pod = cluster.pod_name(component)
+    if not pod:
+        return False, ""
+    return run_cmd(f"kubectl exec {pod} -- {command} 2>/dev/null")
+
+def test_postgres(cluster):
+    success, _ = exec_in(cluster, "postgres", "pg_isready -U admin -d TaskManagementDb")
     return success
 
-def test_redis():
-    success, output = run_cmd("kubectl exec $(kubectl get pod -l app.kubernetes.io/component=redis -o jsonpath='{.items[0].metadata.name}') -- redis-cli ping 2>/dev/null")
+def test_redis(cluster):
+    success, output = exec_in(cluster, "redis", "redis-cli ping")
     return success and "PONG" in output
 
-def test_kafka():
-    success, _ = run_cmd("kubectl exec $(kubectl get pod -l app.kubernetes.io/component=kafka -o jsonpath='{.items[0].metadata.name}') -- kafka-broker-api-versions --bootstrap-server localhost:9092 2>/dev/null")
+def test_kafka(cluster):
+    success, _ = exec_in(cluster, "kafka", "kafka-broker-api-versions --bootstrap-server localhost:9092")
     return success
 
-def test_rabbitmq():
-    success, _ = run_cmd("kubectl exec $(kubectl get pod -l app.kubernetes.io/component=rabbitmq -o jsonpath='{.items[0].metadata.name}') -- rabbitmqctl status 2>/dev/null")
+def test_rabbitmq(cluster):
+    success, _ = exec_in(cluster, "rabbitmq", "rabbitmqctl status")
     return success
 
-def test_elasticsearch():
-    success, _ = run_cmd("kubectl exec $(kubectl get pod -l app.kubernetes.io/component=elasticsearch -o jsonpath='{.items[0].metadata.name}') -- curl -u elastic:elastic123 -sf http://localhost:9200/_cluster/health 2>/dev/null")
+def test_elasticsearch(cluster):
+    # Not via service_proxy like Grafana: the API server strips the Authorization header once it has
+    # authenticated the request, so Elasticsearch's basic auth would never arrive
+    success, _ = exec_in(cluster, "elasticsearch", "curl -u elastic:elastic123 -sf http://localhost:9200/_cluster/health")
     return success
 
-def test_grafana():
-    success, _ = run_cmd("kubectl exec $(kubectl get pod -l app.kubernetes.io/component=grafana -o jsonpath='{.items[0].metadata.name}') -- curl -sf http://localhost:3000/api/health 2>/dev/null")
-    return success
+def test_grafana(cluster):
+    try:
+        cluster.service_proxy("rtmc-grafana", 3000, "/api/health")
+        return True
+    except ClusterError:
+        return False
 
-def test_api():
+def test_api(cluster):
     success, _ = run_cmd("curl -sf http://localhost:8080/weatherforecast > /dev/null 2>&1")
     return success
 
-def test_frontend():
+def test_frontend(cluster):
     success, _ = run_cmd("curl -sf http://localhost:3001 > /dev/null 2>&1")
     return success
 
@@ -94,20 +87,26 @@ def main():
     table.add_column("Pod Status", width=20)
     table.add_column("Connection", width=20)
 
+    try:
+        cluster = Cluster(resources=("pods",), watch=False).start()
+    except ClusterError as e:
+        console.print(f"[red]Cannot query the cluster: {e}[/red]")
+        sys.exit(1)
+
     all_ok = True
     pods_starting = False
 
-    with tqdm(total=len(services), desc="Checking services", ncols=80, colour="cyan") as pbar:
+    with cluster, tqdm(total=len(services), desc="Checking services", ncols=80, colour="cyan") as pbar:
         for name, (component, test_func) in services.items():
             pbar.set_description(f"Checking {name:12}")
 
-            running, status = get_pod_status(component)
+            running, status = cluster.pod_status(component)
 
             if running:
                 if name == "API":
                     time.sleep(1)
 
-                connected = test_func()
+                connected = test_func(cluster)
                 if connected:
                     table.add_row(name, "[green]Running[/green]", "[green]✓ Connected[/green]")
                 else:
@@ -138,6 +137,7 @@ def main():
     console.print("  [blue]RabbitMQ:[/blue]       kubectl port-forward svc/rtmc-rabbitmq 15672:15672")
     console.print("  [blue]Grafana:[/blue]        kubectl port-forward svc/rtmc-grafana 3000:3000")
     console.print("  [blue]Elasticsearch:[/blue]  kubectl port-forward svc/rtmc-elasticsearch 9200:9200\n")
+    console.print(f"[dim]{cluster.summary()}[/dim]\n")
 
     sys.exit(0 if all_ok else 1)
 
@@ -2,6 +2,7 @@
 # /// script
 # dependencies = [
 #   "loguru",
+#   "pyyaml",
 #   "rich"
 # ]
 # ///
@@ -11,6 +12,7 @@ import sys
 import os
 from loguru import logger
 from rich.console import Console
+from k8s.cluster import Cluster, ClusterError
 
 console = Console()
 logger.remove()
@@ -28,8 +30,11 @@ def check_docker_compose():
     return False
 
 def check_k3d():
-    success, _ = run_cmd("kubectl get pods -l app.kubernetes.io/instance=rtmc 2>/dev/null")
-    return success
+    try:
+        Cluster(resources=("pods",), watch=False).start().close()
+        return True
+    except ClusterError:
+        return False
 
 def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))